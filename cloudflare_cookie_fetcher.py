@@ -4,189 +4,643 @@ Cloudflare Cookie Fetcher
 Automates login to Cloudflare and extracts cookies for a domain.
 """
 
+import atexit
+import functools
 import json
 import logging
+import logging.handlers
+import math
 import os
+import queue
+import random
+import re
+import shutil
+import stat
 import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional
+from urllib.parse import urlsplit
 from camoufox import Camoufox
-from playwright.sync_api import Page, Browser
+from playwright.sync_api import Page, Browser, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 from dotenv import load_dotenv
 
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    _json_dumps = functools.partial(json.dumps, separators=(',', ':'), ensure_ascii=False)
+
+
+# Returns the first selector whose first match is rendered, or null.
+# Selectors the browser can't parse (e.g. Playwright text engines) are skipped.
+_JS_FIND_VISIBLE = """
+sels => sels.find(s => {
+    let el;
+    try {
+        el = document.querySelector(s);
+    } catch (e) {
+        return false;
+    }
+    return !!el && !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+}) || null
+"""
+
+# True once none of the given selectors has a visible match.
+_JS_NONE_VISIBLE = f"sels => !({_JS_FIND_VISIBLE.strip()})(sels)"
+
+# Elements that only render for an authenticated dashboard session.
+_LOGIN_INDICATORS = (
+    '[data-testid="user-menu-button"]',
+    '[data-testid="user-dropdown"]',
+    '.user-menu',
+    '.account-menu',
+    'button[aria-label*="account"]',
+    'button[aria-label*="user"]',
+    'div[data-testid*="user"]',
+    'nav[data-testid*="user"]',
+    # Dashboard specific elements
+    '[data-testid="dashboard"]',
+    '.dashboard',
+    'main[role="main"]',
+    '[data-testid="zone-list"]',
+)
+
+_LOGIN_INDICATORS_CSS = ", ".join(_LOGIN_INDICATORS)
+
+# Login form email field.
+_EMAIL_SELECTORS = (
+    'input[type="email"]',
+    'input[name="email"]',
+    '#email',
+)
+
+_EMAIL_SELECTORS_CSS = ", ".join(_EMAIL_SELECTORS)
+
+# Login form password field.
+_PASSWORD_SELECTORS = (
+    'input[type="password"]',
+    'input[name="password"]',
+    '#password',
+)
+
+# Enabled type=submit buttons, probed before any text-based fallback.
+_SUBMIT_SELECTORS = (
+    'button[type="submit"]:not([disabled])',
+    'input[type="submit"]:not([disabled])',
+)
+
+# Playwright-only filters shared by the text-based submit fallbacks,
+# excluding the third-party sign-in buttons.
+_SUBMIT_FILTERS = ':not(:has-text("Google")):not(:has-text("Apple")):visible:not([disabled])'
+
+# Text-based fallbacks in priority order; each is its own locator because
+# a union would resolve in document order instead.
+_SUBMIT_TEXT_SELECTORS = tuple(
+    f'button:has-text("{text}"){_SUBMIT_FILTERS}' for text in ('Log in', 'Sign in', 'Continue')
+)
+
+# Last resort once no submit-like button matched by type or text.
+_SUBMIT_GENERIC_SELECTORS = (
+    f'form button{_SUBMIT_FILTERS}',
+    f'[role="button"]{_SUBMIT_FILTERS}',
+)
+
+# Full-page Cloudflare challenge indicators.
+_CHALLENGE_SELECTORS = (
+    '[data-ray]',  # Cloudflare Ray ID
+    '.cf-browser-verification',
+    '.cf-checking-browser',
+    '#cf-spinner-please-wait',
+)
+
+# Every iframe variant the Turnstile widget has shipped in.
+_IFRAME_SELECTORS = (
+    "iframe[title='Widget containing a Cloudflare security challenge']",
+    "iframe[src*='challenges.cloudflare.com']",
+    "iframe[src*='cloudflare']",
+    "iframe[src*='turnstile']",
+)
+
+_IFRAME_SELECTORS_CSS = ", ".join(_IFRAME_SELECTORS)
+
+# Turnstile checkbox candidates: the CSS union is resolved in one query,
+# XPath and the content scan ("*") only run if it misses.
+_CHECKBOX_SELECTORS = (
+    ", ".join((
+        "input[type='checkbox']",
+        ".cb-lb input",
+        ".cf-turnstile-wrapper input",
+        "[data-testid='turnstile-checkbox']",
+        ":text('Verify you are human')",
+    )),
+    "//label[contains(@class, 'cb-lb')]",
+    "//span[text()='Verify you are human']",
+    "*",
+)
+
+# Text and class names that mark the checkbox area in the content scan
+# (JavaScript regex sources, matched case-insensitively in the page).
+_CHECKBOX_TEXT_PATTERN = r'verify|human|not a robot'
+_CHECKBOX_CLASS_PATTERN = r'cb-|checkbox|turnstile'
+
+# Tags the first label/input/div/span whose text or class matches the given
+# patterns with data-cf-target, returning its text and class (or null).
+_JS_MARK_CHECKBOX_AREA = """
+([textPattern, classPattern]) => {
+    const textRe = new RegExp(textPattern, 'i');
+    const classRe = new RegExp(classPattern, 'i');
+    for (const el of document.querySelectorAll('label, input, div, span')) {
+        const text = el.innerText || el.textContent || '';
+        const cls = typeof el.className === 'string' ? el.className : '';
+        if (textRe.test(text) || classRe.test(cls)) {
+            el.setAttribute('data-cf-target', '1');
+            return {text: text.slice(0, 50), cls: cls};
+        }
+    }
+    return null;
+}
+"""
+
+# Turnstile success markers inside the challenge iframe.
+_CHALLENGE_SUCCESS_SELECTORS = (
+    '#success',
+    '.success',
+    "[data-testid='success']",
+    '.cf-turnstile-success',
+    '.check-mark',
+    "svg[class*='success']",
+)
+
+# First visible success marker, or 'text=Success' when the widget only
+# reports success in its text.
+_JS_FIND_SUCCESS = f"""
+sels => ({_JS_FIND_VISIBLE.strip()})(sels) ||
+    (/success/i.test(document.body ? document.body.innerText : '') ? 'text=Success' : null)
+"""
+
+# True once the widget succeeded, its checkbox is ticked or it's verifying.
+_JS_CHALLENGE_PROGRESS = f"""
+sels => !!(({_JS_FIND_SUCCESS.strip()})(sels) ||
+    document.querySelector("input[type='checkbox']:checked, .loading, .processing, .spinner"))
+"""
+
+# Debug summary of the first clickable elements in the challenge iframe.
+_JS_DESCRIBE_CLICKABLES = """
+() => {
+    const els = document.querySelectorAll('input, button, label, span, div');
+    return {
+        total: document.getElementsByTagName('*').length,
+        clickable: els.length,
+        sample: Array.from(els).slice(0, 10).map(el => ({
+            tag: el.tagName,
+            cls: typeof el.className === 'string' ? el.className : '',
+            txt: (el.innerText || '').slice(0, 50),
+        })),
+        html: document.documentElement.outerHTML.slice(0, 500),
+    };
+}
+"""
+
+# Login page URLs, matched in one pass without lowercasing the URL.
+_LOGIN_URL_RE = re.compile(r'login|sign-in', re.IGNORECASE)
+
+# Anything that signals a challenge is showing, as one selector.
+_CHALLENGE_MARKERS_CSS = ", ".join((_IFRAME_SELECTORS_CSS,) + _CHALLENGE_SELECTORS)
+
+# URL fragments of Cloudflare's interstitial challenge pages.
+_CHALLENGE_URL_MARKERS = ('challenges.cloudflare.com', '/cdn-cgi/challenge-platform')
+
+# Origins whose cookies are extracted.
+_COOKIE_URLS = (
+    'https://dash.cloudflare.com',
+    'https://www.cloudflare.com',
+)
+
+# Requests the cookie flow never needs; scripts, XHR and documents still
+# go through so the login form and Turnstile keep working. Stylesheets
+# are kept too, the visibility probes depend on layout.
+_BLOCKED_RESOURCE_TYPES = frozenset({
+    'image', 'imageset', 'font', 'media', 'texttrack', 'beacon', 'ping', 'csp_report',
+})
+_BLOCKED_HOSTS = ('google-analytics.com', 'googletagmanager.com', 'sentry.io')
+
+
+# Whether stdout can print the emoji used in status messages (checked once)
+_UNICODE_CONSOLE = (sys.stdout.encoding or '').lower().replace('-', '').startswith('utf')
+
+# ASCII stand-ins for the status emoji on non-UTF-8 consoles
+_ASCII_MARKERS = {
+    '✅': '[OK]',
+    '❌': '[ERR]',
+    '⚠️': '[WARN]',
+    'ℹ️': '[INFO]',
+    '❓': '[?]',
+}
+
+
+def _console_text(text: str) -> str:
+    """Make a status message printable on the current console."""
+    if _UNICODE_CONSOLE:
+        return text
+    for symbol, marker in _ASCII_MARKERS.items():
+        text = text.replace(symbol, marker)
+    # Drop any remaining decorative emoji the console can't encode
+    encoding = sys.stdout.encoding or 'ascii'
+    text = text.encode(encoding, 'ignore').decode(encoding)
+    return text.replace('\n ', '\n').lstrip(' ')
+
+
+def _is_login_url(url: str) -> bool:
+    """Check whether a URL points at the Cloudflare login page."""
+    return _LOGIN_URL_RE.search(url) is not None
+
+
+def _is_dashboard_url(url: str) -> bool:
+    """Check whether a URL is a logged-in page on the Cloudflare dashboard host."""
+    parts = urlsplit(url)
+    if parts.hostname != 'dash.cloudflare.com' or _is_login_url(url):
+        return False
+    return (parts.path in ('', '/') or '/zones/' in parts.path or
+            'dashboard' in url or 'overview' in url)
+
+
+def _safe_filename(text: str) -> str:
+    """Reduce text to characters that are safe in a file name."""
+    return re.sub(r'[^\w.@-]', '_', text)
+
+
+def _is_login_request(response) -> bool:
+    """Match the response to the login form's POST."""
+    return response.request.method == 'POST' and _is_login_url(response.url)
+
+
+class LoginRejectedError(Exception):
+    """Cloudflare turned the credentials down; retrying would risk a lockout."""
+
+
+class JSONFormatter(logging.Formatter):
+    """Format log records as one JSON object per line."""
+    
+    # ISO 8601 local time with milliseconds, straight from record.created
+    # (the base class would join the milliseconds with a comma)
+    default_time_format = '%Y-%m-%dT%H:%M:%S'
+    default_msec_format = '%s.%03d'
+    
+    def format(self, record):
+        log_entry = {
+            'timestamp': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno
+        }
+        return _json_dumps(log_entry)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Plain-text console format, degraded to ASCII markers when needed."""
+    
+    def format(self, record):
+        return _console_text(super().format(record))
+
+
+_logging_lock = threading.Lock()
+
+
+def _configure_logging(log_level: str) -> logging.Logger:
+    """Set up the module logger once per process and apply the log level."""
+    logger = logging.getLogger('cloudflare_cookie_fetcher')
+    logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
+    
+    with _logging_lock:
+        # Handlers from an earlier fetcher are reused, not stacked
+        if logger.handlers:
+            return logger
+        
+        # Create logs directory if it doesn't exist
+        os.makedirs('logs', exist_ok=True)
+        
+        # Create file handler with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        log_file = f'logs/cloudflare_cookies_{timestamp}.json'
+        
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(JSONFormatter())
+        
+        # Write the JSON log in batches; errors and shutdown flush right away
+        buffered_file_handler = logging.handlers.MemoryHandler(
+            capacity=64, flushLevel=logging.ERROR, target=file_handler)
+        
+        # Also add console handler for immediate feedback
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ConsoleFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+        
+        # Hand records to a background thread so file and console writes
+        # stay off the browser automation path
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, buffered_file_handler, console_handler)
+        listener.start()
+        atexit.register(listener.stop)
+        
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    
+    return logger
+
+
+@dataclass(frozen=True)
+class FetcherConfig:
+    """Settings read from the environment and the .env file."""
+    
+    # Browser settings
+    headless: bool
+    humanize: bool
+    timeout: int
+    
+    # Cloudflare credentials
+    username: Optional[str]
+    password: Optional[str]
+    
+    # Output settings
+    cookies_filename: str
+    log_level: str
+    debug_screenshots: bool
+    
+    # Proxy settings
+    http_proxy: Optional[str]
+    https_proxy: Optional[str]
+    
+    # Advanced settings
+    challenge_timeout: int
+    max_retries: int
+    retry_delay: int
+    block_resources: bool
+    max_browser_uses: int
+    
+    # Browser profile settings
+    persistent_profile: bool
+    profile_dir: str
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> FetcherConfig:
+    """Parse .env and the environment once per process."""
+    load_dotenv()
+    
+    return FetcherConfig(
+        headless=os.getenv('HEADLESS', 'false').lower() == 'true',
+        humanize=os.getenv('HUMANIZE', 'true').lower() == 'true',
+        timeout=int(os.getenv('TIMEOUT', '30000')),
+        username=os.getenv('CLOUDFLARE_USERNAME'),
+        password=os.getenv('CLOUDFLARE_PASSWORD'),
+        cookies_filename=os.getenv('COOKIES_FILENAME', 'cf-cookies.txt'),
+        log_level=os.getenv('LOG_LEVEL', 'INFO'),
+        debug_screenshots=os.getenv('DEBUG_SCREENSHOTS', 'false').lower() == 'true',
+        http_proxy=os.getenv('HTTP_PROXY'),
+        https_proxy=os.getenv('HTTPS_PROXY'),
+        challenge_timeout=int(os.getenv('CHALLENGE_TIMEOUT', '30')),
+        max_retries=int(os.getenv('MAX_RETRIES', '3')),
+        retry_delay=int(os.getenv('RETRY_DELAY', '5')),
+        block_resources=os.getenv('BLOCK_RESOURCES', 'true').lower() == 'true',
+        max_browser_uses=int(os.getenv('MAX_BROWSER_USES', '0')),
+        persistent_profile=os.getenv('PERSISTENT_PROFILE', 'true').lower() == 'true',
+        profile_dir=os.getenv('PROFILE_DIRECTORY', 'browser_profile'),
+    )
+
 
 class CloudflareCookieFetcher:
     """Main class for fetching Cloudflare cookies."""
     
+    # Browser shared by every fetcher in the process, launched on first use
+    _browser = None
+    _browser_stack = None
+    _browser_uses = 0
+    _browser_lock = threading.Lock()
+    
     def __init__(self):
-        """Initialize the cookie fetcher with environment variables."""
-        # Load environment variables
-        load_dotenv()
+        """Initialize the cookie fetcher from the cached environment config."""
+        self.config = config = _load_config()
         
         # Browser settings
-        self.headless = os.getenv('HEADLESS', 'false').lower() == 'true'
-        self.humanize = os.getenv('HUMANIZE', 'true').lower() == 'true'
-        self.timeout = int(os.getenv('TIMEOUT', '30000'))
+        self.headless = config.headless
+        self.humanize = config.humanize
+        self.timeout = config.timeout
         
         # Cloudflare credentials
-        self.username = os.getenv('CLOUDFLARE_USERNAME')
-        self.password = os.getenv('CLOUDFLARE_PASSWORD')
+        self.username = config.username
+        self.password = config.password
         
         # Output settings
-        self.cookies_filename = os.getenv('COOKIES_FILENAME', 'cf-cookies.txt')
-        self.log_level = os.getenv('LOG_LEVEL', 'INFO')
+        self.cookies_filename = config.cookies_filename
+        self.log_level = config.log_level
         
         # Proxy settings
-        self.http_proxy = os.getenv('HTTP_PROXY')
-        self.https_proxy = os.getenv('HTTPS_PROXY')
+        self.http_proxy = config.http_proxy
+        self.https_proxy = config.https_proxy
         
         # Advanced settings
-        self.challenge_timeout = int(os.getenv('CHALLENGE_TIMEOUT', '30'))
-        self.max_retries = int(os.getenv('MAX_RETRIES', '3'))
-        self.retry_delay = int(os.getenv('RETRY_DELAY', '5'))
+        self.challenge_timeout = config.challenge_timeout
+        self.max_retries = config.max_retries
+        self.retry_delay = config.retry_delay
+        self.block_resources = config.block_resources
+        self.max_browser_uses = config.max_browser_uses
         
         # Screenshot settings
         self.screenshot_dir = "screenshots"
+        self._screenshot_path = Path(self.screenshot_dir)
+        self._screenshots_enabled = self.log_level.upper() == 'DEBUG' or config.debug_screenshots
         self.step_counter = 0
         
         # Browser profile settings
-        self.persistent_profile = os.getenv('PERSISTENT_PROFILE', 'true').lower() == 'true'
-        self.profile_dir = os.getenv('PROFILE_DIRECTORY', 'browser_profile')
+        self.persistent_profile = config.persistent_profile
+        self.profile_dir = config.profile_dir
+        self._profile_path = Path(self.profile_dir)
+        self._storage_state_path = self._profile_path / 'storage_state.json'
         
-        self.logger = self._setup_logger()
+        self.logger = _configure_logging(self.log_level)
         self._setup_screenshots()
-        self._setup_browser_profile()
-        
-    def _setup_logger(self) -> logging.Logger:
-        """Set up logging configuration."""
-        logger = logging.getLogger('cloudflare_cookie_fetcher')
-        logger.setLevel(getattr(logging, self.log_level.upper(), logging.INFO))
+        if self.persistent_profile:
+            self._setup_browser_profile()
         
-        # Create logs directory if it doesn't exist
-        os.makedirs('logs', exist_ok=True)
-        
-        # Create file handler with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_file = f'logs/cloudflare_cookies_{timestamp}.json'
-        
-        # Create a custom formatter for JSON logging
-        class JSONFormatter(logging.Formatter):
-            def format(self, record):
-                log_entry = {
-                    'timestamp': datetime.now().isoformat(),
-                    'level': record.levelname,
-                    'message': record.getMessage(),
-                    'module': record.module,
-                    'function': record.funcName,
-                    'line': record.lineno
-                }
-                return json.dumps(log_entry)
-        
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(JSONFormatter())
-        
-        # Also add console handler for immediate feedback
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-        
-        return logger
-    
     def _setup_screenshots(self) -> None:
         """Set up screenshot directory and clean previous screenshots."""
         try:
-            # Create screenshots directory
-            os.makedirs(self.screenshot_dir, exist_ok=True)
-            
-            # Clean previous screenshots
-            import glob
-            screenshot_files = glob.glob(f"{self.screenshot_dir}/*.png")
-            for file in screenshot_files:
-                try:
-                    os.remove(file)
-                except:
-                    pass
+            # Drop previous screenshots and recreate the directory
+            shutil.rmtree(self._screenshot_path, ignore_errors=True)
+            self._screenshot_path.mkdir(parents=True, exist_ok=True)
             
-            self.logger.info(f"Screenshot directory prepared: {self.screenshot_dir}")
+            self.logger.info("Screenshot directory prepared: %s", self.screenshot_dir)
             
         except Exception as e:
-            self.logger.warning(f"Failed to setup screenshots: {str(e)}")
+            self.logger.warning("Failed to setup screenshots: %s", e)
     
     def _setup_browser_profile(self) -> None:
         """Set up persistent browser profile directory."""
         try:
             # Create browser profile directory
-            os.makedirs(self.profile_dir, exist_ok=True)
-            self.logger.info(f"📁 Browser profile directory ready: {self.profile_dir}")
+            self._profile_path.mkdir(parents=True, exist_ok=True)
+            self.logger.info("📁 Browser profile directory ready: %s", self.profile_dir)
             
         except Exception as e:
-            self.logger.warning(f"Failed to setup browser profile: {str(e)}")
+            self.logger.warning("Failed to setup browser profile: %s", e)
+    
+    @classmethod
+    def _get_or_create_browser(cls, browser_options: Dict, max_uses: int = 0) -> Browser:
+        """Return the shared Camoufox browser, launching it on first use.
+        
+        With max_uses > 0 the browser is relaunched after that many runs so
+        a long-lived process doesn't accumulate browser memory.
+        """
+        with cls._browser_lock:
+            if cls._browser is not None and max_uses and cls._browser_uses >= max_uses:
+                cls._close_browser_locked()
+            
+            if cls._browser is None:
+                stack = ExitStack()
+                cls._browser = stack.enter_context(Camoufox(**browser_options))
+                cls._browser_stack = stack
+                if cls._browser_uses == 0:
+                    atexit.register(cls.close_browser)
+                cls._browser_uses = 0
+            
+            cls._browser_uses += 1
+            return cls._browser
+    
+    @classmethod
+    def close_browser(cls) -> None:
+        """Shut down the shared browser, if one was launched."""
+        with cls._browser_lock:
+            cls._close_browser_locked()
+    
+    @classmethod
+    def _close_browser_locked(cls) -> None:
+        """Shut down the shared browser; the caller holds the browser lock."""
+        if cls._browser_stack is not None:
+            stack, cls._browser_stack, cls._browser = cls._browser_stack, None, None
+            stack.close()
     
-    def take_step_screenshot(self, page: Page, step_name: str) -> str:
-        """Take a screenshot for a specific step."""
+    def __enter__(self) -> "CloudflareCookieFetcher":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # The browser stays warm across run() calls inside the block
+        self.close_browser()
+    
+    @staticmethod
+    def _route_request(route) -> None:
+        """Abort heavy assets and analytics requests, continue everything else."""
+        request = route.request
+        if (request.resource_type in _BLOCKED_RESOURCE_TYPES or
+                any(host in request.url for host in _BLOCKED_HOSTS)):
+            route.abort()
+        else:
+            route.continue_()
+    
+    def _retry(self, operation, *args, before_retry=None):
+        """Call operation, retrying failures with jittered exponential backoff.
+        
+        LoginRejectedError is never retried. before_retry, if given, runs
+        before each new attempt to reset the page, and a failure there counts
+        as a failed attempt. A truthy result from it means the work is already
+        done, so the operation is not called again.
+        """
+        # The first attempt always runs, whatever MAX_RETRIES says
+        attempts = max(1, self.max_retries + 1)
+        for attempt in range(attempts):
+            try:
+                if attempt and before_retry and before_retry():
+                    return None
+                return operation(*args)
+            except LoginRejectedError:
+                raise
+            except Exception as e:
+                if attempt + 1 >= attempts:
+                    raise
+                delay = (min(20, self.retry_delay * 2 ** attempt) +
+                         random.uniform(0, 0.5 * self.retry_delay))
+                self.logger.warning("⚠️ Attempt %s/%s failed: %s - retrying in %.1fs",
+                                    attempt + 1, attempts, e, delay)
+                time.sleep(delay)
+    
+    def take_step_screenshot(self, page: Page, step_name: str, force: bool = False) -> Optional[str]:
+        """Take a screenshot for a specific step (only when screenshots are enabled or forced)."""
+        if not (self._screenshots_enabled or force):
+            return None
         try:
             self.step_counter += 1
-            filename = f"step_{self.step_counter:02d}_{step_name}.png"
-            screenshot_path = f"{self.screenshot_dir}/{filename}"
-            page.screenshot(path=screenshot_path, full_page=True)
-            self.logger.info(f"📸 Screenshot: {filename}")
-            return screenshot_path
+            filename = f"step_{self.step_counter:02d}_{step_name}.jpg"
+            screenshot_path = self._screenshot_path / filename
+            page.screenshot(path=screenshot_path, type="jpeg", quality=60, full_page=False)
+            self.logger.info("📸 Screenshot: %s", filename)
+            return str(screenshot_path)
         except Exception as e:
-            self.logger.error(f"Failed to take screenshot {step_name}: {str(e)}")
+            self.logger.error("Failed to take screenshot %s: %s", step_name, e)
             return None
     
     def humanized_wait(self, min_seconds: float = 1.0, max_seconds: float = 3.0) -> None:
-        """Human-like random wait."""
-        import random
-        wait_time = random.uniform(min_seconds, max_seconds)
-        self.logger.info(f"⏳ Humanized wait: {wait_time:.1f}s")
-        import time
+        """Human-like random wait, skipped entirely when humanization is off."""
+        if not self.humanize:
+            return
+        # Peaks in the middle of the range instead of a flat distribution
+        wait_time = random.triangular(min_seconds, max_seconds)
+        self.logger.info("⏳ Humanized wait: %.1fs", wait_time)
         time.sleep(wait_time)
     
+    def _find_visible(self, target, selectors: List[str]) -> Optional[str]:
+        """Return the first selector with a visible match, probed in one evaluate call."""
+        try:
+            return target.evaluate(_JS_FIND_VISIBLE, list(selectors))
+        except PlaywrightError as e:
+            self.logger.debug("Batched selector probe failed: %s", e)
+            return None
+    
+    def _is_storage_fresh(self, storage_state_path: Path) -> bool:
+        """Check the saved session file for any unexpired Cloudflare cookie."""
+        try:
+            with open(storage_state_path, encoding='utf-8') as f:
+                cookies = json.load(f).get('cookies', [])
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable browser session: %s", e)
+            return False
+        
+        now = time.time()
+        for cookie in cookies:
+            if not cookie.get('domain', '').endswith('cloudflare.com'):
+                continue
+            if cookie.get('expires', -1) < 0 or cookie['expires'] > now:
+                return True
+        self.logger.info("❌ No live Cloudflare cookies in saved session - not logged in")
+        return False
+    
     def check_login_status(self, page: Page) -> bool:
         """Check if user is already logged in to Cloudflare."""
         try:
             self.logger.info("🔍 Checking current login status")
             
-            # Multiple indicators of being logged in
-            login_indicators = [
-                '[data-testid="user-menu-button"]',
-                '[data-testid="user-dropdown"]',
-                '.user-menu',
-                '.account-menu',
-                'button[aria-label*="account"]',
-                'button[aria-label*="user"]',
-                'div[data-testid*="user"]',
-                'nav[data-testid*="user"]',
-                # Dashboard specific elements
-                '[data-testid="dashboard"]',
-                '.dashboard',
-                'main[role="main"]',
-                '[data-testid="zone-list"]'
-            ]
-            
-            for indicator in login_indicators:
-                try:
-                    if page.locator(indicator).count() > 0 and page.locator(indicator).first.is_visible():
-                        self.logger.info(f"✅ Found login indicator: {indicator}")
-                        return True
-                except:
-                    continue
+            # Probe all indicators in a single round-trip to the browser
+            indicator = self._find_visible(page, _LOGIN_INDICATORS)
+            if indicator:
+                self.logger.info("✅ Found login indicator: %s", indicator)
+                return True
             
             # Also check URL for dashboard patterns
             current_url = page.url
-            if ('dash.cloudflare.com' in current_url and 
-                not ('login' in current_url.lower() or 'sign-in' in current_url.lower())):
-                if ('dashboard' in current_url or 'overview' in current_url or 
-                    current_url.endswith('dash.cloudflare.com/') or
-                    '/zones/' in current_url):
-                    self.logger.info("✅ Login detected from URL pattern")
-                    return True
+            if _is_dashboard_url(current_url):
+                self.logger.info("✅ Login detected from URL pattern")
+                return True
             
             # Check if we're on login page (not logged in)
-            if 'login' in current_url.lower() or 'sign-in' in current_url.lower():
+            if _is_login_url(current_url):
                 self.logger.info("❌ Currently on login page - not logged in")
                 return False
             
@@ -194,33 +648,73 @@ class CloudflareCookieFetcher:
             return False
             
         except Exception as e:
-            self.logger.error(f"Error checking login status: {str(e)}")
+            self.logger.error("Error checking login status: %s", e)
             return False
     
-    def navigate_to_cloudflare(self, page: Page) -> None:
-        """Navigate to Cloudflare dashboard."""
+    def _wait_for_page_ready(self, page: Page, selector: str) -> bool:
+        """Wait for the DOM and the first element signalling the page is usable."""
+        page.wait_for_load_state("domcontentloaded", timeout=self.timeout)
+        try:
+            # Filter to visible matches first; otherwise only the first match in
+            # document order is watched, and a hidden one stalls the whole wait
+            page.wait_for_selector(f"{selector} >> visible=true", state="visible", timeout=self.timeout)
+            return True
+        except PlaywrightTimeoutError:
+            self.logger.debug("Timed out waiting for ready selector: %s", selector)
+            return False
+    
+    def navigate_to_cloudflare(self, page: Page) -> bool:
+        """Navigate to Cloudflare dashboard.
+        
+        Returns True when the navigation was answered with a Cloudflare challenge.
+        """
         try:
             self.logger.info("🌐 Navigating to Cloudflare dashboard")
-            page.goto("https://dash.cloudflare.com", timeout=self.timeout)
+            response = page.goto("https://dash.cloudflare.com", timeout=self.timeout)
             
-            # Wait for page to load
-            page.wait_for_load_state("networkidle", timeout=self.timeout)
+            # Cloudflare flags interstitial challenges on the document response
+            challenged = (response is not None and
+                          response.headers.get('cf-mitigated') == 'challenge')
+            if challenged:
+                self.logger.info("🛡️ Navigation answered with a Cloudflare challenge")
+            else:
+                # Wait for either the dashboard or the login form to render
+                self._wait_for_page_ready(page, _LOGIN_INDICATORS_CSS + ", " + _EMAIL_SELECTORS_CSS)
             self.take_step_screenshot(page, "navigate_to_cloudflare")
             
             # Humanized wait after navigation
             self.humanized_wait(2.0, 4.0)
             
             self.logger.info("✅ Successfully navigated to Cloudflare dashboard")
+            return challenged
         except Exception as e:
-            self.logger.error(f"❌ Failed to navigate to Cloudflare: {str(e)}")
+            self.logger.error("❌ Failed to navigate to Cloudflare: %s", e)
             raise
     
+    def _open_dashboard(self, page: Page) -> None:
+        """Navigate to the dashboard, solve any challenge, and wait for the page to settle."""
+        challenged = self.navigate_to_cloudflare(page)
+        
+        # Handle Cloudflare challenge, if the response or the page shows one
+        if challenged or self._challenge_likely(page):
+            self.handle_cloudflare_challenge(page)
+            # The ready wait was skipped for a challenged response; the real
+            # page only renders once the challenge is through
+            self._wait_for_page_ready(page, _LOGIN_INDICATORS_CSS + ", " + _EMAIL_SELECTORS_CSS)
+    
+    def _reopen_for_login(self, page: Page) -> bool:
+        """Reload the dashboard before a login retry; True if the session is already logged in."""
+        self._open_dashboard(page)
+        # A login that went through but failed verification must not submit
+        # the credentials again
+        if self.check_login_status(page):
+            self.logger.info("🎉 Already logged in after reload - skipping login retry")
+            return True
+        return False
+    
     def simulate_human_mouse_movement(self, page: Page, target_x: int, target_y: int) -> None:
         """Simulate human-like mouse movement to target coordinates."""
         try:
-            import random
-            import math
-            
             # Get current mouse position (start from a random position)
             current_x = random.randint(100, 400)
             current_y = random.randint(100, 300)
@@ -229,350 +723,260 @@ class CloudflareCookieFetcher:
             distance = math.sqrt((target_x - current_x) ** 2 + (target_y - current_y) ** 2)
             steps = max(10, int(distance / 20))  # More steps for longer distances
             
-            # Move mouse in curved path with random variations
-            for i in range(steps):
-                progress = i / steps
-                
-                # Add some curve to the movement
-                curve_offset = math.sin(progress * math.pi) * random.uniform(-20, 20)
-                
-                # Calculate intermediate position with curve
-                intermediate_x = current_x + (target_x - current_x) * progress + curve_offset
-                intermediate_y = current_y + (target_y - current_y) * progress
-                
-                # Add small random variations
-                intermediate_x += random.uniform(-3, 3)
-                intermediate_y += random.uniform(-3, 3)
-                
-                # Move mouse to intermediate position
-                page.mouse.move(intermediate_x, intermediate_y)
-                
-                # Random delay between movements
-                import time
-                time.sleep(random.uniform(0.01, 0.03))
+            # Bend the path through an offset midpoint; Playwright interpolates
+            # the intermediate moves itself, so each leg is a single call
+            mid_x = (current_x + target_x) / 2 + random.uniform(-20, 20)
+            mid_y = (current_y + target_y) / 2 + random.uniform(-3, 3)
             
-            # Final precise movement to target
-            page.mouse.move(target_x, target_y)
+            page.mouse.move(current_x, current_y)
+            page.mouse.move(mid_x, mid_y, steps=steps // 2)
+            page.mouse.move(target_x, target_y, steps=steps - steps // 2)
             
         except Exception as e:
-            self.logger.debug(f"Mouse movement simulation failed: {str(e)}")
+            self.logger.debug("Mouse movement simulation failed: %s", e)
             # Fallback to direct movement
             page.mouse.move(target_x, target_y)
     
     def _try_hover_focus_click(self, element) -> None:
-        """Try hover, focus, and click sequence."""
-        element.hover()
-        self.humanized_wait(0.2, 0.5)
-        element.focus()
-        self.humanized_wait(0.1, 0.3)
+        """Try hover, focus, and click sequence (a plain click when humanize is off)."""
+        if self.humanize:
+            element.hover()
+            self.humanized_wait(0.2, 0.5)
+            element.focus()
+            self.humanized_wait(0.1, 0.3)
         element.click()
     
-    def _try_coordinate_click(self, frame, element) -> None:
+    def _try_coordinate_click(self, page: Page, element) -> None:
         """Try clicking using exact coordinates."""
+        # Bounding boxes are page-relative even inside an iframe, and only
+        # the page has a mouse
         bbox = element.bounding_box()
         if bbox:
-            import random
             center_x = bbox['x'] + bbox['width'] / 2 + random.uniform(-2, 2)
             center_y = bbox['y'] + bbox['height'] / 2 + random.uniform(-2, 2)
-            frame.mouse.click(center_x, center_y)
+            page.mouse.click(center_x, center_y)
     
     def _check_challenge_progress(self, frame) -> bool:
         """Check if challenge is progressing or completed."""
         try:
-            # Look for success indicators
-            success_selectors = [
-                "#success",
-                ".success",
-                "text=Success",
-                "[data-testid='success']",
-                ".cf-turnstile-success",
-                ".check-mark",
-                "svg[class*='success']"
-            ]
-            
-            for selector in success_selectors:
-                try:
-                    if frame.locator(selector).count() > 0 and frame.locator(selector).is_visible():
-                        return True
-                except:
-                    continue
-            
-            # Check for any visual changes that indicate progress
-            try:
-                # Look for any checked checkboxes
-                checked_boxes = frame.locator("input[type='checkbox']:checked").count()
-                if checked_boxes > 0:
-                    return True
-                
-                # Look for loading or processing indicators
-                loading_indicators = frame.locator(".loading, .processing, .spinner").count()
-                if loading_indicators > 0:
-                    return True
-                    
-            except:
-                pass
-            
-            return False
-            
-        except Exception as e:
-            self.logger.debug(f"Challenge progress check failed: {str(e)}")
+            # Success markers, a ticked checkbox or a spinner, in one round-trip
+            return frame.evaluate(_JS_CHALLENGE_PROGRESS, list(_CHALLENGE_SUCCESS_SELECTORS))
+        except PlaywrightError as e:
+            self.logger.debug("Challenge progress check failed: %s", e)
             return False
     
+    def _challenge_likely(self, page: Page) -> bool:
+        """Cheap check for a challenge on the page: URL first, then one DOM probe."""
+        if any(marker in page.url for marker in _CHALLENGE_URL_MARKERS):
+            return True
+        # Each selector on its own: a union would only test its first match in
+        # document order, which may be a hidden iframe ahead of the real widget
+        return self._find_visible(page, _IFRAME_SELECTORS + _CHALLENGE_SELECTORS) is not None
+    
     def handle_cloudflare_challenge(self, page: Page) -> None:
         """Handle Cloudflare challenge with advanced human-like behavior."""
         try:
             self.logger.info("🔍 Checking for Cloudflare challenge")
             
-            # Wait for potential challenge to appear
-            self.humanized_wait(3.0, 5.0)
+            # Give a challenge a few seconds to render (longer when humanized),
+            # moving on as soon as one does
+            try:
+                page.wait_for_selector(f"{_CHALLENGE_MARKERS_CSS} >> visible=true", state="visible",
+                                       timeout=random.uniform(3000, 5000) if self.humanize else 3000)
+            except PlaywrightTimeoutError:
+                pass
             self.take_step_screenshot(page, "check_cloudflare_challenge")
             
-            # Check for Cloudflare iframe challenge first
-            iframe_selectors = [
-                "iframe[title='Widget containing a Cloudflare security challenge']",
-                "iframe[src*='challenges.cloudflare.com']",
-                "iframe[src*='cloudflare']",
-                "iframe[src*='turnstile']"
-            ]
-            
-            for iframe_selector in iframe_selectors:
-                try:
-                    iframe = page.locator(iframe_selector)
-                    if iframe.count() > 0 and iframe.is_visible():
-                        self.logger.info("🛡️ Cloudflare iframe challenge detected")
-                        self.take_step_screenshot(page, "cloudflare_iframe_detected")
-                        
-                        # Wait for iframe to fully load
-                        self.humanized_wait(2.0, 4.0)
+            # Check for Cloudflare iframe challenge first (one locator for every
+            # variant, skipping hidden frames that would otherwise come first)
+            try:
+                iframe = page.locator(f"{_IFRAME_SELECTORS_CSS} >> visible=true").first
+                if iframe.is_visible():
+                    self.logger.info("🛡️ Cloudflare iframe challenge detected")
+                    self.take_step_screenshot(page, "cloudflare_iframe_detected")
+                    
+                    # Switch to iframe
+                    iframe_element = iframe
+                    frame = iframe_element.content_frame()
+                    
+                    if frame:
+                        self.logger.info("🔄 Switching to Cloudflare challenge iframe")
                         
-                        # Switch to iframe
-                        iframe_element = iframe.first
-                        frame = iframe_element.content_frame()
+                        # Wait for the checkbox to render rather than a fixed pause
+                        try:
+                            frame.wait_for_selector(_CHECKBOX_SELECTORS[0], state="visible", timeout=5000)
+                        except PlaywrightTimeoutError:
+                            self.logger.debug("Challenge checkbox did not render in time")
                         
-                        if frame:
-                            self.logger.info("🔄 Switching to Cloudflare challenge iframe")
-                            
-                            # Wait for iframe content to load completely
-                            self.humanized_wait(3.0, 5.0)
-                            
-                            # Debug: Take screenshot of iframe content
+                        # Debug: screenshot and describe the iframe content in one round-trip
+                        if self.logger.isEnabledFor(logging.DEBUG):
                             try:
                                 self.take_step_screenshot(page, "iframe_content_debug")
-                                
-                                # Get iframe HTML for debugging
-                                iframe_html = frame.evaluate("document.documentElement.outerHTML")
-                                self.logger.info(f"📋 Iframe HTML content (first 500 chars): {iframe_html[:500]}")
-                                
+                                info = frame.evaluate(_JS_DESCRIBE_CLICKABLES)
+                                self.logger.debug("📋 Iframe HTML content (first 500 chars): %s", info['html'])
+                                self.logger.debug("🔍 Found %s total elements in iframe", info['total'])
+                                self.logger.debug("🔍 Found %s potentially clickable elements", info['clickable'])
+                                for i, element in enumerate(info['sample']):
+                                    self.logger.debug("📝 Element %s: %s class='%s' text='%s'",
+                                                      i, element['tag'], element['cls'], element['txt'])
                             except Exception as e:
-                                self.logger.debug(f"Debug info failed: {str(e)}")
-                            
-                            # Look for the checkbox with multiple strategies
-                            checkbox_selectors = [
-                                "//label[contains(@class, 'cb-lb')]/input[@type='checkbox']",
-                                "//label[contains(@class, 'cb-lb')]",
-                                "input[type='checkbox']",
-                                "label input[type='checkbox']",
-                                ".cb-lb input",
-                                ".cf-turnstile-wrapper input",
-                                "[data-testid='turnstile-checkbox']",
-                                "text=Verify you are human",
-                                "//span[text()='Verify you are human']",
-                                "*"  # Last resort - find all elements
-                            ]
-                            
-                            # First, let's see what elements exist in the iframe
+                                self.logger.debug("Debug info failed: %s", e)
+                        
+                        # Look for the checkbox with multiple strategies
+                        checkbox_clicked = False
+                        found_element = None
+                        
+                        for attempt, checkbox_selector in enumerate(_CHECKBOX_SELECTORS):
                             try:
-                                all_elements = frame.locator("*").all()
-                                self.logger.info(f"🔍 Found {len(all_elements)} total elements in iframe")
+                                self.logger.info("🔍 Trying selector: %s", checkbox_selector)
                                 
-                                # Check for any clickable elements
-                                clickable_elements = frame.locator("input, button, label, span, div").all()
-                                self.logger.info(f"🔍 Found {len(clickable_elements)} potentially clickable elements")
+                                # Try to find the checkbox
+                                if checkbox_selector == "*":
+                                    # Special case - scan in-page for anything that looks like a checkbox area
+                                    match = frame.evaluate(_JS_MARK_CHECKBOX_AREA,
+                                                           [_CHECKBOX_TEXT_PATTERN, _CHECKBOX_CLASS_PATTERN])
+                                    if match:
+                                        found_element = frame.locator('[data-cf-target="1"]').first
+                                        self.logger.info("✅ Found potential checkbox element by content: %s class: %s",
+                                                         match['text'], match['cls'])
+                                else:
+                                    checkbox = frame.locator(checkbox_selector)
+                                    if checkbox.count() > 0:
+                                        found_element = checkbox.first
+                                        self.logger.info("✅ Found element with selector: %s", checkbox_selector)
                                 
-                                for i, element in enumerate(clickable_elements[:10]):  # Check first 10
+                                if found_element:
                                     try:
-                                        tag_name = element.evaluate("el => el.tagName")
-                                        class_name = element.evaluate("el => el.className")
-                                        inner_text = element.evaluate("el => el.innerText")
-                                        self.logger.info(f"📝 Element {i}: {tag_name} class='{class_name}' text='{inner_text[:50]}'")
-                                    except:
-                                        pass
+                                        # Wait for element to be ready (raises if it never shows)
+                                        found_element.wait_for(state="visible", timeout=3000)
+                                        self.logger.info("✅ Element is visible, attempting interaction")
+                                        self.take_step_screenshot(page, f"checkbox_found_{attempt}")
                                         
-                            except Exception as e:
-                                self.logger.debug(f"Element enumeration failed: {str(e)}")
-                            
-                            checkbox_clicked = False
-                            found_element = None
-                            
-                            for checkbox_selector in checkbox_selectors:
-                                try:
-                                    self.logger.info(f"🔍 Trying selector: {checkbox_selector}")
-                                    
-                                    # Try to find the checkbox
-                                    if checkbox_selector == "*":
-                                        # Special case - try to click anything that looks like a checkbox area
-                                        elements = frame.locator("label, input, div, span").all()
-                                        for element in elements:
+                                        # Try multiple click approaches
+                                        click_methods = [
+                                            ("hover_focus_click", lambda: self._try_hover_focus_click(found_element)),
+                                            ("force_click", lambda: found_element.click(force=True)),
+                                            ("js_click", lambda: found_element.evaluate("el => el.click()")),
+                                            ("dispatch_event", lambda: found_element.evaluate("""
+                                                el => {
+                                                    el.dispatchEvent(new MouseEvent('mousedown', {bubbles: true}));
+                                                    el.dispatchEvent(new MouseEvent('mouseup', {bubbles: true}));
+                                                    el.dispatchEvent(new MouseEvent('click', {bubbles: true}));
+                                                }
+                                            """)),
+                                            ("coordinate_click", lambda: self._try_coordinate_click(page, found_element))
+                                        ]
+                                        
+                                        for method_name, method_func in click_methods:
                                             try:
-                                                text = element.evaluate("el => el.innerText || el.textContent || ''")
-                                                class_name = element.evaluate("el => el.className || ''")
-                                                if any(keyword in text.lower() for keyword in ["verify", "human", "not a robot"]) or \
-                                                   any(keyword in class_name.lower() for keyword in ["cb-", "checkbox", "turnstile"]):
-                                                    found_element = element
-                                                    self.logger.info(f"✅ Found potential checkbox element by content: {text[:50]} class: {class_name}")
-                                                    break
-                                            except:
-                                                continue
-                                    else:
-                                        checkbox = frame.locator(checkbox_selector)
-                                        if checkbox.count() > 0:
-                                            found_element = checkbox.first
-                                            self.logger.info(f"✅ Found element with selector: {checkbox_selector}")
-                                    
-                                    if found_element:
-                                        try:
-                                            # Wait for element to be ready
-                                            found_element.wait_for(state="visible", timeout=3000)
-                                            
-                                            if found_element.is_visible():
-                                                self.logger.info(f"✅ Element is visible, attempting interaction")
-                                                self.take_step_screenshot(page, f"checkbox_found_{checkbox_selector.replace('/', '_').replace('*', 'wildcard')}")
-                                                
-                                                # Try multiple click approaches
-                                                click_methods = [
-                                                    ("hover_focus_click", lambda: self._try_hover_focus_click(found_element)),
-                                                    ("force_click", lambda: found_element.click(force=True)),
-                                                    ("js_click", lambda: found_element.evaluate("el => el.click()")),
-                                                    ("dispatch_event", lambda: found_element.evaluate("""
-                                                        el => {
-                                                            el.dispatchEvent(new MouseEvent('mousedown', {bubbles: true}));
-                                                            el.dispatchEvent(new MouseEvent('mouseup', {bubbles: true}));
-                                                            el.dispatchEvent(new MouseEvent('click', {bubbles: true}));
-                                                        }
-                                                    """)),
-                                                    ("coordinate_click", lambda: self._try_coordinate_click(frame, found_element))
-                                                ]
-                                                
-                                                for method_name, method_func in click_methods:
-                                                    try:
-                                                        self.logger.info(f"🖱️ Trying click method: {method_name}")
-                                                        method_func()
-                                                        self.humanized_wait(1.0, 2.0)
-                                                        self.take_step_screenshot(page, f"after_{method_name}")
-                                                        
-                                                        # Check if click was successful by looking for changes
-                                                        if self._check_challenge_progress(frame):
-                                                            self.logger.info(f"✅ Click successful with method: {method_name}")
-                                                            checkbox_clicked = True
-                                                            break
-                                                            
-                                                    except Exception as e:
-                                                        self.logger.debug(f"Click method {method_name} failed: {str(e)}")
-                                                        continue
+                                                self.logger.info("🖱️ Trying click method: %s", method_name)
+                                                method_func()
+                                                # Give the widget a moment to react rather than a fixed pause
+                                                try:
+                                                    frame.wait_for_function(_JS_CHALLENGE_PROGRESS, arg=list(_CHALLENGE_SUCCESS_SELECTORS), timeout=2000)
+                                                except PlaywrightTimeoutError:
+                                                    pass
+                                                self.take_step_screenshot(page, f"after_{method_name}")
                                                 
-                                                if checkbox_clicked:
+                                                # Check if click was successful by looking for changes
+                                                if self._check_challenge_progress(frame):
+                                                    self.logger.info("✅ Click successful with method: %s", method_name)
+                                                    checkbox_clicked = True
                                                     break
                                                     
-                                        except Exception as e:
-                                            self.logger.debug(f"Element interaction failed: {str(e)}")
-                                            continue
+                                            except PlaywrightError as e:
+                                                self.logger.debug("Click method %s failed: %s", method_name, e)
+                                                continue
+                                        
+                                        if checkbox_clicked:
+                                            break
                                             
-                                except Exception as e:
-                                    self.logger.debug(f"Selector {checkbox_selector} failed: {str(e)}")
-                                    continue
+                                    except PlaywrightError as e:
+                                        self.logger.debug("Element interaction failed: %s", e)
+                                        continue
+                                        
+                            except PlaywrightError as e:
+                                self.logger.debug("Selector %s failed: %s", checkbox_selector, e)
+                                continue
+                        
+                        if not checkbox_clicked:
+                            self.logger.warning("⚠️ Could not find or click Cloudflare checkbox - trying generic iframe click")
+                            # Last resort - click center of iframe
+                            try:
+                                iframe_bbox = iframe_element.bounding_box()
+                                if iframe_bbox:
+                                    center_x = iframe_bbox['x'] + iframe_bbox['width'] / 2
+                                    center_y = iframe_bbox['y'] + iframe_bbox['height'] / 2
+                                    page.mouse.click(center_x, center_y)
+                                    self.logger.info("🖱️ Clicked center of iframe as fallback")
+                                    checkbox_clicked = True
+                            except Exception as e:
+                                self.logger.error("Fallback iframe click failed: %s", e)
+                        
+                        if checkbox_clicked:
+                            # Wait for challenge processing
+                            self.logger.info("⏳ Waiting for Cloudflare challenge to process...")
+                            
+                            challenge_resolved = False
+                            
+                            # Wait in-page for a success indicator instead of sleeping first
+                            try:
+                                success_selector = frame.wait_for_function(
+                                    _JS_FIND_SUCCESS, arg=list(_CHALLENGE_SUCCESS_SELECTORS), timeout=5000
+                                ).json_value()
+                            except PlaywrightError as e:
+                                self.logger.debug("No success indicator appeared: %s", e)
+                                success_selector = None
+                            if success_selector:
+                                self.logger.info("✅ Challenge success indicator found: %s", success_selector)
+                                challenge_resolved = True
                             
-                            if not checkbox_clicked:
-                                self.logger.warning("⚠️ Could not find or click Cloudflare checkbox - trying generic iframe click")
-                                # Last resort - click center of iframe
+                            # If no success indicator, check if iframe disappeared
+                            # (watched in-page rather than polled from Python)
+                            if not challenge_resolved:
                                 try:
-                                    iframe_bbox = iframe_element.bounding_box()
-                                    if iframe_bbox:
-                                        center_x = iframe_bbox['x'] + iframe_bbox['width'] / 2
-                                        center_y = iframe_bbox['y'] + iframe_bbox['height'] / 2
-                                        page.mouse.click(center_x, center_y)
-                                        self.logger.info("🖱️ Clicked center of iframe as fallback")
-                                        checkbox_clicked = True
-                                except Exception as e:
-                                    self.logger.error(f"Fallback iframe click failed: {str(e)}")
+                                    # Same visible-only locator, so a hidden iframe earlier
+                                    # in the DOM doesn't count as the widget going away
+                                    iframe.wait_for(state="hidden", timeout=self.challenge_timeout * 1000)
+                                    self.logger.info("✅ Cloudflare challenge resolved - iframe disappeared")
+                                    challenge_resolved = True
+                                except PlaywrightTimeoutError:
+                                    pass
                             
-                            if checkbox_clicked:
-                                # Wait for challenge processing
-                                self.logger.info("⏳ Waiting for Cloudflare challenge to process...")
-                                self.humanized_wait(3.0, 5.0)
-                                
-                                # Look for success indicators
-                                success_selectors = [
-                                    "#success",
-                                    ".success",
-                                    "text=Success",
-                                    "[data-testid='success']",
-                                    ".cf-turnstile-success"
-                                ]
-                                
-                                challenge_resolved = False
-                                
-                                # Check for success indicators
-                                for success_selector in success_selectors:
-                                    try:
-                                        success_element = frame.locator(success_selector)
-                                        if success_element.count() > 0 and success_element.is_visible():
-                                            self.logger.info(f"✅ Challenge success indicator found: {success_selector}")
-                                            challenge_resolved = True
-                                            break
-                                    except:
-                                        continue
-                                
-                                # If no success indicator, check if iframe disappeared
-                                if not challenge_resolved:
-                                    for _ in range(30):  # Check for 30 seconds
-                                        if not page.locator(iframe_selector).is_visible():
-                                            self.logger.info("✅ Cloudflare challenge resolved - iframe disappeared")
-                                            challenge_resolved = True
-                                            break
-                                        self.humanized_wait(1.0, 1.0)
-                                
-                                if challenge_resolved:
-                                    self.take_step_screenshot(page, "cloudflare_challenge_resolved")
-                                    self.logger.info("✅ Cloudflare challenge completed successfully")
-                                    return
-                                else:
-                                    self.logger.warning("⚠️ Challenge may still be processing")
-                                    self.take_step_screenshot(page, "cloudflare_challenge_processing")
-                                    return
+                            if challenge_resolved:
+                                self.take_step_screenshot(page, "cloudflare_challenge_resolved")
+                                self.logger.info("✅ Cloudflare challenge completed successfully")
+                                return
                             else:
-                                self.logger.warning("⚠️ Could not find Cloudflare checkbox in iframe")
+                                self.logger.warning("⚠️ Challenge may still be processing")
+                                self.take_step_screenshot(page, "cloudflare_challenge_processing")
+                                return
                         else:
-                            self.logger.warning("⚠️ Could not access iframe content")
-                except Exception as e:
-                    self.logger.debug(f"Iframe selector {iframe_selector} failed: {str(e)}")
-                    continue
-            
-            # Check for other common Cloudflare challenge indicators
-            challenge_selectors = [
-                '[data-ray]',  # Cloudflare Ray ID
-                '.cf-browser-verification',
-                '.cf-checking-browser',
-                '#cf-spinner-please-wait'
-            ]
-            
-            for selector in challenge_selectors:
-                if page.locator(selector).is_visible():
-                    self.logger.info("🛡️ Cloudflare challenge detected, waiting for resolution")
-                    self.take_step_screenshot(page, "cloudflare_challenge_detected")
-                    
-                    # Wait for challenge to resolve
-                    page.wait_for_selector(selector, state="hidden", timeout=self.challenge_timeout * 1000)
-                    page.wait_for_load_state("networkidle", timeout=self.timeout)
-                    
-                    self.take_step_screenshot(page, "cloudflare_challenge_resolved")
-                    self.logger.info("✅ Cloudflare challenge resolved")
-                    return
+                            self.logger.warning("⚠️ Could not find Cloudflare checkbox in iframe")
+                    else:
+                        self.logger.warning("⚠️ Could not access iframe content")
+            except Exception as e:
+                self.logger.debug("Iframe challenge handling failed: %s", e)
+            
+            selector = self._find_visible(page, _CHALLENGE_SELECTORS)
+            if selector:
+                self.logger.info("🛡️ Cloudflare challenge detected, waiting for resolution")
+                self.take_step_screenshot(page, "cloudflare_challenge_detected")
+                
+                # Wait in-page until every challenge indicator has gone
+                page.wait_for_function(_JS_NONE_VISIBLE, arg=list(_CHALLENGE_SELECTORS),
+                                       timeout=self.challenge_timeout * 1000)
+                page.wait_for_load_state("domcontentloaded", timeout=self.timeout)
+                
+                self.take_step_screenshot(page, "cloudflare_challenge_resolved")
+                self.logger.info("✅ Cloudflare challenge resolved")
+                return
             
             self.logger.info("ℹ️ No Cloudflare challenge detected")
             
         except Exception as e:
-            self.logger.warning(f"⚠️ Error handling Cloudflare challenge: {str(e)}")
-            self.take_step_screenshot(page, "cloudflare_challenge_error")
+            self.logger.warning("⚠️ Error handling Cloudflare challenge: %s", e)
+            self.take_step_screenshot(page, "cloudflare_challenge_error", force=True)
             # Continue anyway as challenge might have resolved
     
     
@@ -582,21 +986,10 @@ class CloudflareCookieFetcher:
             self.logger.info("🔐 Starting automated login process")
             self.take_step_screenshot(page, "before_login")
             
-            # Look for login form
-            login_selectors = [
-                'input[type="email"]',
-                'input[name="email"]',
-                '#email'
-            ]
-            
             email_input = None
-            for selector in login_selectors:
-                try:
-                    if page.locator(selector).count() > 0 and page.locator(selector).is_visible():
-                        email_input = page.locator(selector).first
-                        break
-                except:
-                    continue
+            email_selector = self._find_visible(page, _EMAIL_SELECTORS)
+            if email_selector:
+                email_input = page.locator(email_selector).first
             
             if not email_input:
                 self.logger.error("❌ Could not find email input field")
@@ -606,10 +999,10 @@ class CloudflareCookieFetcher:
             self.logger.info("✏️ Filling email field")
             self.humanized_wait(1.0, 2.0)
             
-            # Get email input position for human-like interaction
-            email_bbox = email_input.bounding_box()
+            # Get email input position for human-like interaction (skipped,
+            # along with the layout query, when humanize is off)
+            email_bbox = email_input.bounding_box() if self.humanize else None
             if email_bbox:
-                import random
                 email_x = email_bbox['x'] + email_bbox['width'] / 2 + random.uniform(-10, 10)
                 email_y = email_bbox['y'] + email_bbox['height'] / 2 + random.uniform(-2, 2)
                 self.simulate_human_mouse_movement(page, email_x, email_y)
@@ -620,21 +1013,10 @@ class CloudflareCookieFetcher:
             self.take_step_screenshot(page, "email_filled")
             self.humanized_wait(1.0, 2.0)
             
-            # Find password field
-            password_selectors = [
-                'input[type="password"]',
-                'input[name="password"]',
-                '#password'
-            ]
-            
             password_input = None
-            for selector in password_selectors:
-                try:
-                    if page.locator(selector).count() > 0 and page.locator(selector).is_visible():
-                        password_input = page.locator(selector).first
-                        break
-                except:
-                    continue
+            password_selector = self._find_visible(page, _PASSWORD_SELECTORS)
+            if password_selector:
+                password_input = page.locator(password_selector).first
             
             if not password_input:
                 self.logger.error("❌ Could not find password input field")
@@ -644,9 +1026,8 @@ class CloudflareCookieFetcher:
             self.logger.info("✏️ Filling password field")
             
             # Get password input position for human-like interaction
-            password_bbox = password_input.bounding_box()
+            password_bbox = password_input.bounding_box() if self.humanize else None
             if password_bbox:
-                import random
                 password_x = password_bbox['x'] + password_bbox['width'] / 2 + random.uniform(-10, 10)
                 password_y = password_bbox['y'] + password_bbox['height'] / 2 + random.uniform(-2, 2)
                 self.simulate_human_mouse_movement(page, password_x, password_y)
@@ -659,33 +1040,28 @@ class CloudflareCookieFetcher:
             
             # Handle any verification challenges before submitting
             self.logger.info("🔍 Checking for verification challenges before login")
-            self.handle_cloudflare_challenge(page)
+            if self._challenge_likely(page):
+                self.handle_cloudflare_challenge(page)
             
             # Find and click submit button
             submit_button = None
-            submit_selectors = [
-                'button[type="submit"]',
-                'input[type="submit"]',
-                'button:has-text("Log in"):not(:has-text("Google")):not(:has-text("Apple"))',
-                'button:has-text("Sign in"):not(:has-text("Google")):not(:has-text("Apple"))',
-                'button:has-text("Continue"):not(:has-text("Google")):not(:has-text("Apple"))',
-                'form button:not(:has-text("Google")):not(:has-text("Apple"))',
-                '[role="button"]:not(:has-text("Google")):not(:has-text("Apple"))'
-            ]
-            
-            for selector in submit_selectors:
-                try:
-                    locator = page.locator(selector)
-                    if locator.count() > 0 and locator.first.is_visible() and not locator.first.is_disabled():
-                        submit_button = locator.first
-                        self.logger.info(f"✅ Found submit button: {selector}")
+            # Plain CSS candidates are probed in one round-trip, then the
+            # text-based and generic candidates one by one, in priority order
+            submit_selector = self._find_visible(page, _SUBMIT_SELECTORS)
+            if submit_selector:
+                submit_button = page.locator(submit_selector).first
+                self.logger.info("✅ Found submit button: %s", submit_selector)
+            else:
+                for selector in _SUBMIT_TEXT_SELECTORS + _SUBMIT_GENERIC_SELECTORS:
+                    locator = page.locator(selector).first
+                    if locator.count() > 0:
+                        submit_button = locator
+                        self.logger.info("✅ Found submit button: %s", selector)
                         break
-                except:
-                    continue
             
             if not submit_button:
                 self.logger.error("❌ Could not find enabled submit button")
-                self.take_step_screenshot(page, "submit_button_not_found")
+                self.take_step_screenshot(page, "submit_button_not_found", force=True)
                 raise Exception("Submit button not found or disabled")
             
             # Human-like submit button interaction
@@ -693,238 +1069,300 @@ class CloudflareCookieFetcher:
             self.take_step_screenshot(page, "before_submit")
             
             # Get submit button position for human-like click
-            submit_bbox = submit_button.bounding_box()
+            submit_bbox = submit_button.bounding_box() if self.humanize else None
             if submit_bbox:
-                import random
                 submit_x = submit_bbox['x'] + submit_bbox['width'] / 2 + random.uniform(-5, 5)
                 submit_y = submit_bbox['y'] + submit_bbox['height'] / 2 + random.uniform(-2, 2)
                 self.simulate_human_mouse_movement(page, submit_x, submit_y)
             
-            # Humanized submit sequence
-            submit_button.hover()
-            self.humanized_wait(0.5, 1.0)
-            submit_button.focus()
-            self.humanized_wait(0.2, 0.5)
-            submit_button.click()
+            # Humanized submit sequence; a plain click otherwise
+            if self.humanize:
+                submit_button.hover()
+                self.humanized_wait(0.5, 1.0)
+                submit_button.focus()
+                self.humanized_wait(0.2, 0.5)
+            
+            # Watch the login request itself, briefly: an error answer fails
+            # fast instead of waiting out the navigation and dashboard timeouts.
+            # The response wait finishes when the block exits, so only a timeout
+            # after the click went through means there was no login request;
+            # a failed click propagates and can be retried.
+            login_response = None
+            clicked = False
+            try:
+                with page.expect_response(_is_login_request, timeout=10000) as response_info:
+                    submit_button.click()
+                    clicked = True
+                login_response = response_info.value
+            except PlaywrightTimeoutError:
+                if not clicked:
+                    raise
+                self.logger.debug("No login request seen after submit")
+            
+            if login_response is not None:
+                self.logger.info("📨 Login request answered with HTTP %s", login_response.status)
+                if not login_response.ok:
+                    self.take_step_screenshot(page, "login_rejected", force=True)
+                    raise LoginRejectedError(f"Login rejected with HTTP {login_response.status}")
             
             self.take_step_screenshot(page, "after_submit_click")
             
-            # Wait for login to process
+            # Wait for login to process: returns on the navigation away from
+            # the login page instead of sleeping a fixed amount
             self.logger.info("⏳ Waiting for login to process...")
-            self.humanized_wait(3.0, 5.0)
+            try:
+                page.wait_for_url(lambda url: not _is_login_url(url), timeout=self.timeout)
+            except PlaywrightTimeoutError:
+                self.logger.warning("⚠️ No navigation away from the login page after submit")
             
             # Handle any post-login challenges
             self.logger.info("🔍 Checking for post-login challenges")
-            self.handle_cloudflare_challenge(page)
+            if self._challenge_likely(page):
+                self.handle_cloudflare_challenge(page)
             
-            # Wait for page to load after login
-            page.wait_for_load_state("networkidle", timeout=self.timeout)
-            self.humanized_wait(2.0, 4.0)
+            # Wait for the dashboard to render after login
+            # Returns as soon as a dashboard element renders, no fixed pause
+            if self._wait_for_page_ready(page, _LOGIN_INDICATORS_CSS):
+                self.logger.info("✅ Dashboard rendered after login")
             
             # Verify login success
             self.logger.info("🔍 Verifying login success...")
             self.take_step_screenshot(page, "login_verification")
             
-            # Check for success indicators
-            success_selectors = [
-                '[data-testid="user-menu-button"]',
-                '[data-testid="user-dropdown"]',
-                '.user-menu',
-                '.account-menu',
-                'button[aria-label*="account"]',
-                'button[aria-label*="user"]',
-                'div[data-testid*="user"]',
-                'nav[data-testid*="user"]',
-                '[data-testid="dashboard"]',
-                '.dashboard',
-                'main[role="main"]',
-                '[data-testid="zone-list"]'
-            ]
-            
             login_success = False
-            found_indicator = None
             
-            for selector in success_selectors:
-                try:
-                    if page.locator(selector).count() > 0 and page.locator(selector).first.is_visible():
-                        self.logger.info(f"✅ Login success indicator found: {selector}")
-                        found_indicator = selector
-                        login_success = True
-                        break
-                except:
-                    continue
+            found_indicator = self._find_visible(page, _LOGIN_INDICATORS)
+            if found_indicator:
+                self.logger.info("✅ Login success indicator found: %s", found_indicator)
+                login_success = True
             
             # Also check URL for dashboard
             current_url = page.url
-            self.logger.info(f"🌐 Current URL: {current_url}")
+            self.logger.info("🌐 Current URL: %s", current_url)
             
-            if 'dash.cloudflare.com' in current_url and not ('login' in current_url.lower() or 'sign-in' in current_url.lower()):
-                if 'dashboard' in current_url or 'overview' in current_url or current_url.endswith('dash.cloudflare.com/'):
-                    self.logger.info("✅ Login success detected from URL pattern")
-                    login_success = True
+            if _is_dashboard_url(current_url):
+                self.logger.info("✅ Login success detected from URL pattern")
+                login_success = True
             
             # Check if we're still on login page (failure indicator)
-            if 'login' in current_url.lower() or 'sign-in' in current_url.lower():
+            if _is_login_url(current_url):
                 self.logger.warning("⚠️ Still on login page - login may have failed")
                 login_success = False
             
             if login_success:
-                self.logger.info(f"✅ Automated login successful! (indicator: {found_indicator or 'URL pattern'})")
+                self.logger.info("✅ Automated login successful! (indicator: %s)", found_indicator or 'URL pattern')
                 self.take_step_screenshot(page, "login_success")
             else:
-                self.logger.error(f"❌ Automated login failed - Current URL: {current_url}")
-                self.take_step_screenshot(page, "login_failed")
-                raise Exception(f"Login failed - still on login page: {current_url}")
+                self.logger.error("❌ Automated login failed - Current URL: %s", current_url)
+                self.take_step_screenshot(page, "login_failed", force=True)
+                if _is_login_url(current_url):
+                    raise LoginRejectedError(f"Login failed - still on login page: {current_url}")
+                raise Exception(f"Login failed - no dashboard at: {current_url}")
             
         except Exception as e:
-            self.logger.error(f"❌ Automated login failed: {str(e)}")
+            self.logger.error("❌ Automated login failed: %s", e)
             raise
     
     
+    def _save_storage_state(self, context, storage_state_path: Path) -> None:
+        """Write the context's storage state, skipping the write when unchanged."""
+        payload = _json_dumps(context.storage_state())
+        try:
+            if storage_state_path.read_text(encoding='utf-8') == payload:
+                self.logger.info("💾 Browser session unchanged: %s", storage_state_path)
+                return
+        except OSError:
+            pass
+        
+        storage_state_path.write_text(payload, encoding='utf-8')
+        self.logger.info("💾 Browser session saved to: %s", storage_state_path)
+    
     def extract_cookies(self, page: Page) -> List[Dict]:
         """Extract cookies from the current page."""
         try:
             self.logger.info("Extracting cookies from Cloudflare")
             
-            # Get all cookies for the current domain
-            cookies = page.context.cookies()
+            # Let the browser return only the cookies sent to Cloudflare
+            cloudflare_cookies = page.context.cookies(list(_COOKIE_URLS))
             
-            # Filter for Cloudflare domain cookies
-            cloudflare_cookies = [
-                cookie for cookie in cookies 
-                if 'cloudflare.com' in cookie.get('domain', '')
-            ]
-            
-            self.logger.info(f"Extracted {len(cloudflare_cookies)} Cloudflare cookies")
+            self.logger.info("Extracted %s Cloudflare cookies", len(cloudflare_cookies))
             
             return cloudflare_cookies
             
         except Exception as e:
-            self.logger.error(f"Failed to extract cookies: {str(e)}")
+            self.logger.error("Failed to extract cookies: %s", e)
             raise
     
-    def save_cookies_to_file(self, cookies: List[Dict]) -> None:
-        """Save cookies to a text file in curl -b format."""
+    def save_cookies_to_file(self, cloudflare_cookies: List[Dict],
+                             cookies_filename: Optional[str] = None) -> None:
+        """Save cookies already filtered by extract_cookies to a text file in curl -b format."""
+        cookies_filename = cookies_filename or self.cookies_filename
         try:
-            self.logger.info(f"Saving cookies to {self.cookies_filename}")
+            self.logger.info("Saving cookies to %s", cookies_filename)
+            
+            generated_at = datetime.now().isoformat(timespec='seconds')
             
-            # Filter for cloudflare.com cookies only
-            cloudflare_cookies = [
-                cookie for cookie in cookies 
-                if 'cloudflare.com' in cookie.get('domain', '')
+            # Build the whole file in memory and write it in one call
+            parts = [
+                "# Cloudflare Cookies - curl -b format\n",
+                f"# Generated on: {generated_at}\n",
+                "# Usage: curl -b \"$(cat cf-cookies.txt)\" https://dash.cloudflare.com/api/v4/graphql\n\n",
             ]
             
-            with open(self.cookies_filename, 'w', encoding='utf-8') as f:
-                f.write("# Cloudflare Cookies - curl -b format\n")
-                f.write(f"# Generated on: {datetime.now().isoformat()}\n")
-                f.write("# Usage: curl -b \"$(cat cf-cookies.txt)\" https://dash.cloudflare.com/api/v4/graphql\n\n")
-                
-                # Create curl -b format: name=value; name2=value2; ...
-                cookie_pairs = []
-                for cookie in cloudflare_cookies:
-                    name = cookie.get('name', '')
-                    value = cookie.get('value', '')
-                    if name and value:
-                        cookie_pairs.append(f"{name}={value}")
-                
-                # Write cookies in curl -b format
-                if cookie_pairs:
-                    cookies_string = '; '.join(cookie_pairs)
-                    f.write(cookies_string)
-                    f.write('\n')
-                else:
-                    f.write("# No Cloudflare cookies found\n")
-                
-                # Also write individual cookies for reference
-                f.write("\n# Individual cookies (for reference):\n")
-                for cookie in cloudflare_cookies:
-                    name = cookie.get('name', '')
-                    value = cookie.get('value', '')
-                    domain = cookie.get('domain', '')
-                    path = cookie.get('path', '/')
-                    secure = cookie.get('secure', False)
-                    expires = cookie.get('expires', -1)
-                    
-                    f.write(f"# {name}={value} (domain: {domain}, path: {path}, secure: {secure}, expires: {expires})\n")
+            # Create curl -b format: name=value; name2=value2; ...
+            cookie_pairs = [
+                f"{cookie['name']}={cookie['value']}"
+                for cookie in cloudflare_cookies
+                if cookie.get('name') and cookie.get('value')
+            ]
             
-            self.logger.info(f"Successfully saved {len(cloudflare_cookies)} Cloudflare cookies to {self.cookies_filename}")
+            if cookie_pairs:
+                parts.append('; '.join(cookie_pairs) + '\n')
+            else:
+                parts.append("# No Cloudflare cookies found\n")
+            
+            # Also write individual cookies for reference
+            parts.append("\n# Individual cookies (for reference):\n")
+            parts.extend(
+                f"# {cookie.get('name', '')}={cookie.get('value', '')} "
+                f"(domain: {cookie.get('domain', '')}, path: {cookie.get('path', '/')}, "
+                f"secure: {cookie.get('secure', False)}, expires: {cookie.get('expires', -1)})\n"
+                for cookie in cloudflare_cookies
+            )
+            
+            # Write to a temp file next to the target and swap it in, so a
+            # crash mid-write never leaves a truncated cookies file behind
+            target_dir = os.path.dirname(os.path.abspath(cookies_filename))
+            fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix='.cf-cookies-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(''.join(parts))
+                    f.flush()
+                    os.fsync(f.fileno())
+                # mkstemp creates the file 0600; keep the mode a plain open()
+                # would give, so other readers of the cookies file keep access
+                try:
+                    mode = stat.S_IMODE(os.stat(cookies_filename).st_mode)
+                except FileNotFoundError:
+                    umask = os.umask(0)
+                    os.umask(umask)
+                    mode = 0o666 & ~umask
+                os.chmod(tmp_path, mode)
+                os.replace(tmp_path, cookies_filename)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            
+            self.logger.info("Successfully saved %s Cloudflare cookies to %s", len(cloudflare_cookies), cookies_filename)
             
         except Exception as e:
-            self.logger.error(f"Failed to save cookies: {str(e)}")
+            self.logger.error("Failed to save cookies: %s", e)
             raise
     
+    def _browser_options(self) -> Dict:
+        """Build the Camoufox launch options (no persistent profile in launch)."""
+        browser_options = {
+            'headless': self.headless,
+            'humanize': self.humanize
+        }
+        
+        # Let Firefox skip images itself rather than routing each request
+        if self.block_resources:
+            browser_options['block_images'] = True
+        
+        # Add proxy settings if configured
+        if self.http_proxy or self.https_proxy:
+            browser_options['proxy'] = {}
+            if self.http_proxy:
+                browser_options['proxy']['http'] = self.http_proxy
+            if self.https_proxy:
+                browser_options['proxy']['https'] = self.https_proxy
+        
+        return browser_options
+    
     def run(self) -> None:
         """Run the complete cookie fetching process."""
+        self._fetch(self.username, self.password, self.cookies_filename, self._storage_state_path)
+    
+    def run_many(self, accounts: List[Dict]) -> None:
+        """Fetch cookies for several accounts on the shared browser, one context each.
+        
+        Each account is a dict with 'username', 'password' and 'cookies_filename'.
+        Saved sessions are kept per username in the profile directory; the .env
+        account shares run()'s storage_state.json. A failed account (including a
+        malformed entry) doesn't stop the batch; the failures are raised together
+        at the end.
+        """
+        failed = []
+        for index, account in enumerate(accounts):
+            name = f"account #{index + 1}"
+            try:
+                username = account['username']
+                name = username or name
+                if username == self.username:
+                    storage_state_path = self._storage_state_path
+                else:
+                    storage_state_path = self._profile_path / f"storage_state_{_safe_filename(username)}.json"
+                self._fetch(username, account['password'], account['cookies_filename'],
+                            storage_state_path)
+            except Exception as e:
+                self.logger.error("❌ Cookie fetching failed for %s: %s", name, e)
+                failed.append(f"{name} ({e})")
+        
+        if failed:
+            raise Exception(f"Cookie fetching failed for: {'; '.join(failed)}")
+    
+    def _fetch(self, username: Optional[str], password: Optional[str],
+               cookies_filename: str, storage_state_path: Path) -> None:
+        """Fetch and save one account's cookies in a fresh context on the shared browser."""
         try:
             self.logger.info("Starting Cloudflare cookie fetcher")
             
-            # Prepare browser options (no persistent profile in launch)
-            browser_options = {
-                'headless': self.headless,
-                'humanize': self.humanize
-            }
-            
-            # Add proxy settings if configured
-            if self.http_proxy or self.https_proxy:
-                browser_options['proxy'] = {}
-                if self.http_proxy:
-                    browser_options['proxy']['http'] = self.http_proxy
-                if self.https_proxy:
-                    browser_options['proxy']['https'] = self.https_proxy
-            
-            # Storage state file for persistence
-            storage_state_file = os.path.join(self.profile_dir, 'storage_state.json')
-            
-            with Camoufox(**browser_options) as browser:
-                # Create context with storage state if available
-                context_options = {}
-                
-                if self.persistent_profile and os.path.exists(storage_state_file):
-                    try:
-                        context_options['storage_state'] = storage_state_file
-                        self.logger.info(f"🔧 Loading browser state from: {storage_state_file}")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to load storage state: {str(e)}")
-                        context_options = {}
-                else:
-                    self.logger.info("🔧 Starting fresh browser session")
-                
-                # Create context and page
-                if context_options:
-                    context = browser.new_context(**context_options)
-                    page = context.new_page()
-                else:
-                    page = browser.new_page()
+            # Reuse the shared browser; each run gets its own context
+            browser = self._get_or_create_browser(self._browser_options(), self.max_browser_uses)
+            
+            # Create context with storage state if available
+            context_options = {}
+            
+            # A saved session whose Cloudflare cookies have all expired can't be
+            # logged in, so don't bother loading it
+            storage_state_loaded = self.persistent_profile and self._is_storage_fresh(storage_state_path)
+            if storage_state_loaded:
+                context_options['storage_state'] = storage_state_path
+                self.logger.info("🔧 Loading browser state from: %s", storage_state_path)
+            else:
+                self.logger.info("🔧 Starting fresh browser session")
+            
+            # Create context and page
+            context = browser.new_context(**context_options)
+            if self.block_resources:
+                context.route("**/*", self._route_request)
+            
+            try:
+                page = context.new_page()
                 
-                # Step 1: Navigate to Cloudflare
-                self.navigate_to_cloudflare(page)
+                # Step 1: Navigate to Cloudflare and get past any challenge
+                self._open_dashboard(page)
                 
-                # Step 2: Check if login is required
-                already_logged_in = self.check_login_status(page)
+                # Step 2: Check if login is required. A fresh context can't be
+                # logged in, so the DOM probe only runs for a restored session.
+                already_logged_in = storage_state_loaded and self.check_login_status(page)
                 
                 if not already_logged_in:
                     self.logger.info("🔐 Login required - starting automated authentication process")
                     
-                    # Handle Cloudflare challenge
-                    self.handle_cloudflare_challenge(page)
-                    
                     # Step 3: Perform automated login
-                    if self.username and self.password:
+                    if username and password:
                         self.logger.info("🤖 Starting fully automated login")
-                        self.perform_automatic_login(page, self.username, self.password)
+                        self._retry(self.perform_automatic_login, page, username, password,
+                                    before_retry=lambda: self._reopen_for_login(page))
                     else:
                         self.logger.error("❌ No credentials provided in .env file")
                         raise Exception("Login credentials required but not provided")
                         
-                    # Save storage state after successful login
-                    if self.persistent_profile:
-                        try:
-                            os.makedirs(self.profile_dir, exist_ok=True)
-                            page.context.storage_state(path=storage_state_file)
-                            self.logger.info(f"💾 Login session saved to: {storage_state_file}")
-                        except Exception as e:
-                            self.logger.warning(f"Failed to save storage state: {str(e)}")
-                            
                 else:
                     self.logger.info("🎉 Already logged in - using existing session")
                 
@@ -932,58 +1370,67 @@ class CloudflareCookieFetcher:
                 self.logger.info("🍪 Extracting cookies...")
                 cookies = self.extract_cookies(page)
                 
+                # Persist the session (including refreshed tokens) for the next run
+                if self.persistent_profile:
+                    try:
+                        self._save_storage_state(context, storage_state_path)
+                    except Exception as e:
+                        self.logger.warning("Failed to save storage state: %s", e)
+                
                 # Step 5: Save cookies to file
-                self.save_cookies_to_file(cookies)
+                self.save_cookies_to_file(cookies, cookies_filename)
                 
                 # Final success screenshot
                 self.take_step_screenshot(page, "final_success")
                 
                 self.logger.info("✅ Cloudflare cookie fetching completed successfully")
+            finally:
+                context.close()
                 
         except Exception as e:
-            self.logger.error(f"Cookie fetching failed: {str(e)}")
+            self.logger.error("Cookie fetching failed: %s", e)
             raise
 
 
 def main():
     """Main entry point."""
-    print("🦊 Cloudflare Cookie Fetcher")
+    print(_console_text("🦊 Cloudflare Cookie Fetcher"))
     print("============================")
     
     # Check if .env file exists
     if not os.path.exists('.env'):
-        print("❌ .env file not found!")
+        print(_console_text("❌ .env file not found!"))
         print("Please create a .env file with your configuration.")
         print("You can copy the example .env file and update it with your settings.")
         sys.exit(1)
     
-    # Create and run fetcher
+    # Create and run fetcher; leaving the block closes the shared browser
+    # so no Firefox process outlives us
     try:
-        fetcher = CloudflareCookieFetcher()
-        
-        # Show configuration summary
-        print(f"📊 Configuration:")
-        print(f"   - Headless mode: {fetcher.headless}")
-        print(f"   - Humanize: {fetcher.humanize}")
-        print(f"   - Timeout: {fetcher.timeout}ms")
-        print(f"   - Output file: {fetcher.cookies_filename}")
-        print(f"   - Log level: {fetcher.log_level}")
-        
-        if fetcher.username:
-            print(f"   - Username: {fetcher.username}")
-        else:
-            print("   - Username: Not configured (will skip login)")
-        
-        if fetcher.http_proxy or fetcher.https_proxy:
-            print(f"   - Proxy: Configured")
-        
-        print("\n🚀 Starting cookie extraction...")
-        
-        fetcher.run()
-        print(f"✅ Cookies successfully extracted and saved to {fetcher.cookies_filename}")
+        with CloudflareCookieFetcher() as fetcher:
+            # Show configuration summary
+            print(_console_text("📊 Configuration:"))
+            print(f"   - Headless mode: {fetcher.headless}")
+            print(f"   - Humanize: {fetcher.humanize}")
+            print(f"   - Timeout: {fetcher.timeout}ms")
+            print(f"   - Output file: {fetcher.cookies_filename}")
+            print(f"   - Log level: {fetcher.log_level}")
+            
+            if fetcher.username:
+                print(f"   - Username: {fetcher.username}")
+            else:
+                print("   - Username: Not configured (will skip login)")
+            
+            if fetcher.http_proxy or fetcher.https_proxy:
+                print(f"   - Proxy: Configured")
+            
+            print(_console_text("\n🚀 Starting cookie extraction..."))
+            
+            fetcher.run()
+            print(_console_text(f"✅ Cookies successfully extracted and saved to {fetcher.cookies_filename}"))
         
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
+        print(_console_text(f"❌ Error: {str(e)}"))
         sys.exit(1)
 
 